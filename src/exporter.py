@@ -0,0 +1,127 @@
+import csv
+import importlib.util
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import List
+
+
+# get_exporter()で指定できる名前
+EXPORTER_NAME_LIST: List[str] = ['csv', 'bin', 'pandas', 'parquet']
+
+
+class Exporter(ABC):
+    """
+    対局データをファイルに書き出すクラスの基底クラス。
+    派生クラスはextensionとwrite()を定義する。
+
+    """
+
+    # 書き出すファイルの拡張子
+    extension: str = ''
+
+    def export(self, file_path: str, columns: List[str], rows: List[List[int]]):
+        """
+        対局データを拡張子を付けたファイルに書き出す関数。
+
+        :param file_path: 拡張子を除いた書き出し先のパス
+        :type file_path: str
+        :param columns: 列名のリスト(先頭の列をインデックスとして扱う)
+        :type columns: List[str]
+        :param rows: 各行のデータのリスト
+        :type rows: List[List[int]]
+        """
+        self.write(f'{file_path}.{self.extension}', columns, rows)
+
+    @abstractmethod
+    def write(self, file_path: str, columns: List[str], rows: List[List[int]]):
+        """
+        対局データをファイルに書き出す関数。
+
+        :param file_path: 書き出し先のパス
+        :type file_path: str
+        :param columns: 列名のリスト
+        :type columns: List[str]
+        :param rows: 各行のデータのリスト
+        :type rows: List[List[int]]
+        """
+
+
+class CsvExporter(Exporter):
+    """
+    標準ライブラリのcsvモジュールでCSVファイルに書き出すクラス。
+    pandas.DataFrame.to_csv()で書き出していた従来のファイルと同じ形式になる。
+
+    """
+
+    extension: str = 'csv'
+
+    def write(self, file_path: str, columns: List[str], rows: List[List[int]]):
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+
+class BinaryExporter(Exporter):
+    """
+    行数と列数(各4バイト)に続けて、全ての値を行ごとに4バイトの符号付き整数(リトルエンディアン)で書き出すクラス。
+    列名は書き出さないため、読み込む側でGameRecordの列名と対応付ける。
+
+    """
+
+    extension: str = 'bin'
+
+    def write(self, file_path: str, columns: List[str], rows: List[List[int]]):
+        with open(file_path, 'wb') as f:
+            f.write(struct.pack('<II', len(rows), len(columns)))
+            for row in rows:
+                f.write(struct.pack(f'<{len(row)}i', *row))
+
+
+class PandasExporter(Exporter):
+    """
+    pandas.DataFrameを経由して書き出すクラス。pandasは書き出す時点で初めて読み込む。
+    対局後に失敗しないよう、必要なモジュールが読み込めるかどうかはインスタンスの生成時に確認する。
+
+    :param file_format: 'csv'または'parquet'
+    :type file_format: str
+    """
+
+    def __init__(self, file_format: str = 'csv'):
+        self.extension: str = file_format
+        if importlib.util.find_spec('pandas') is None:
+            raise ImportError('pandas is required for the pandas exporter')
+        if file_format == 'parquet' \
+                and importlib.util.find_spec('pyarrow') is None and importlib.util.find_spec('fastparquet') is None:
+            raise ImportError('pyarrow or fastparquet is required for the parquet exporter')
+
+    def write(self, file_path: str, columns: List[str], rows: List[List[int]]):
+        import pandas as pd
+
+        df = pd.DataFrame(rows, columns=columns).set_index(columns[0])
+        if self.extension == 'parquet':
+            df.to_parquet(file_path)
+        else:
+            df.to_csv(file_path)
+
+
+def get_exporter(name: str) -> 'Exporter':
+    """
+    名前に対応するExporterのインスタンスを返す関数。
+
+    :param name: 'csv'、'bin'、'pandas'、'parquet'のいずれか
+    :type name: str
+    :return: Exporterのインスタンス
+    :rtype: Exporter
+    """
+    if name == 'csv':
+        return CsvExporter()
+    elif name == 'bin':
+        return BinaryExporter()
+    elif name == 'pandas':
+        return PandasExporter('csv')
+    elif name == 'parquet':
+        return PandasExporter('parquet')
+    else:
+        raise ValueError(f'unknown exporter: {name}')
@@ -1,8 +1,9 @@
+import math
 import random
-from typing import List
-import pandas as pd
+from typing import List, Optional
 import datetime
 from collections import deque
+import exporter
 
 
 class OthelloBoard:
@@ -90,22 +91,23 @@ class OthelloBoard:
         :return: 反転する石の位置にビットが立っている整数
         :rtype: int
         """
+        # 盤外へのはみ出しのみをマスクする(四辺上の石も挟む石として扱うため)
         if k == 0:
-            return (put << 8) & 0x00_ff_ff_ff_ff_ff_ff_00
+            return (put << 8) & 0xff_ff_ff_ff_ff_ff_ff_00
         elif k == 1:
-            return (put << 7) & 0x00_7e_7e_7e_7e_7e_7e_00
+            return (put << 7) & 0x7f_7f_7f_7f_7f_7f_7f_00
         elif k == 2:
-            return (put >> 1) & 0x7e_7e_7e_7e_7e_7e_7e_7e
+            return (put >> 1) & 0x7f_7f_7f_7f_7f_7f_7f_7f
         elif k == 3:
-            return (put >> 9) & 0x00_7e_7e_7e_7e_7e_7e_00
+            return (put >> 9) & 0x00_7f_7f_7f_7f_7f_7f_7f
         elif k == 4:
-            return (put >> 8) & 0x00_ff_ff_ff_ff_ff_ff_00
+            return (put >> 8) & 0x00_ff_ff_ff_ff_ff_ff_ff
         elif k == 5:
-            return (put >> 7) & 0x00_7e_7e_7e_7e_7e_7e_00
+            return (put >> 7) & 0x00_fe_fe_fe_fe_fe_fe_fe
         elif k == 6:
-            return (put << 1) & 0x7e_7e_7e_7e_7e_7e_7e_7e
+            return (put << 1) & 0xfe_fe_fe_fe_fe_fe_fe_fe
         elif k == 7:
-            return (put << 9) & 0x00_7e_7e_7e_7e_7e_7e_00
+            return (put << 9) & 0xfe_fe_fe_fe_fe_fe_fe_00
         else:
             return 0
 
@@ -337,6 +339,95 @@ class OthelloBoard:
 
         return confirm
 
+    def get_full_line(self) -> (int, int, int, int):
+        """
+        石で埋まった列上のマスの位置を、横・縦・右上がり斜め・右下がり斜めの方向ごとに返す関数。
+        空きマスを各方向に伝播させ、空きマスが1つも届かなかったマスを埋まった列上のマスとする。
+
+        :return: 横、縦、右上がり斜め、右下がり斜めの各方向で埋まった列上のマスの位置
+        :rtype: (int, int, int, int)
+        """
+        # 空きマス
+        blank_board: int = ~(self.my_stone | self.your_stone) & 0xff_ff_ff_ff_ff_ff_ff_ff
+        # 空きマスを伝播させるための一時変数
+        tmp: int
+
+        # 横 左右に伝播させる
+        tmp = blank_board
+        tmp |= ((tmp << 1) & 0xfe_fe_fe_fe_fe_fe_fe_fe) | ((tmp >> 1) & 0x7f_7f_7f_7f_7f_7f_7f_7f)
+        tmp |= ((tmp << 2) & 0xfc_fc_fc_fc_fc_fc_fc_fc) | ((tmp >> 2) & 0x3f_3f_3f_3f_3f_3f_3f_3f)
+        tmp |= ((tmp << 4) & 0xf0_f0_f0_f0_f0_f0_f0_f0) | ((tmp >> 4) & 0x0f_0f_0f_0f_0f_0f_0f_0f)
+        full_horizontal: int = ~tmp & 0xff_ff_ff_ff_ff_ff_ff_ff
+
+        # 縦 上下に伝播させる
+        tmp = blank_board
+        tmp |= (tmp << 8) | (tmp >> 8)
+        tmp |= (tmp << 16) | (tmp >> 16)
+        tmp |= (tmp << 32) | (tmp >> 32)
+        full_vertical: int = ~tmp & 0xff_ff_ff_ff_ff_ff_ff_ff
+
+        # 右上がり斜め 右上と左下に伝播させる
+        tmp = blank_board
+        tmp |= ((tmp << 7) & 0x7f_7f_7f_7f_7f_7f_7f_00) | ((tmp >> 7) & 0x00_fe_fe_fe_fe_fe_fe_fe)
+        tmp |= ((tmp << 14) & 0x3f_3f_3f_3f_3f_3f_00_00) | ((tmp >> 14) & 0x00_00_fc_fc_fc_fc_fc_fc)
+        tmp |= ((tmp << 28) & 0x0f_0f_0f_0f_00_00_00_00) | ((tmp >> 28) & 0x00_00_00_00_f0_f0_f0_f0)
+        full_diagonal_up: int = ~tmp & 0xff_ff_ff_ff_ff_ff_ff_ff
+
+        # 右下がり斜め 左上と右下に伝播させる
+        tmp = blank_board
+        tmp |= ((tmp << 9) & 0xfe_fe_fe_fe_fe_fe_fe_00) | ((tmp >> 9) & 0x00_7f_7f_7f_7f_7f_7f_7f)
+        tmp |= ((tmp << 18) & 0xfc_fc_fc_fc_fc_fc_00_00) | ((tmp >> 18) & 0x00_00_3f_3f_3f_3f_3f_3f)
+        tmp |= ((tmp << 36) & 0xf0_f0_f0_f0_00_00_00_00) | ((tmp >> 36) & 0x00_00_00_00_0f_0f_0f_0f)
+        full_diagonal_down: int = ~tmp & 0xff_ff_ff_ff_ff_ff_ff_ff
+
+        return full_horizontal, full_vertical, full_diagonal_up, full_diagonal_down
+
+    def get_stable(self, flag: bool = True, full_line: Optional[tuple] = None) -> int:
+        """
+        盤面全体の確定石の位置を返す関数。
+        4方向の全てについて、列が石で埋まっているか、両隣のどちらかが盤外か自分の確定石であれば確定石とし、
+        確定石が増えなくなるまで繰り返す。四辺上に限らず、内側の確定石も求められる。
+
+        :param flag: Trueなら自分の確定石を、Falseなら相手の確定石を探索する。
+        :type flag: bool
+        :param full_line: get_full_line()の戻り値。両者の確定石を求める際に使い回すために指定する。
+        :type full_line: Optional[tuple]
+        :return: 確定石の位置
+        :rtype: int
+        """
+        # 石の位置
+        stone: int = self.my_stone if flag else self.your_stone
+        # 石で埋まった列上のマス
+        if full_line is None:
+            full_line = self.get_full_line()
+        full_horizontal, full_vertical, full_diagonal_up, full_diagonal_down = full_line
+        # 盤外に接するマス
+        # 左端
+        left_side: int = 0x80_80_80_80_80_80_80_80
+        # 右端
+        right_side: int = 0x01_01_01_01_01_01_01_01
+        # 上端
+        top_side: int = 0xff_00_00_00_00_00_00_00
+        # 下端
+        bottom_side: int = 0x00_00_00_00_00_00_00_ff
+        # 確定石の位置
+        stable: int = 0
+
+        while True:
+            # 横
+            tmp: int = full_horizontal | (stable >> 1) | left_side | (stable << 1) | right_side
+            # 縦
+            tmp &= full_vertical | (stable >> 8) | top_side | (stable << 8) | bottom_side
+            # 右上がり斜め
+            tmp &= full_diagonal_up | (stable >> 7) | top_side | right_side | (stable << 7) | bottom_side | left_side
+            # 右下がり斜め
+            tmp &= full_diagonal_down | (stable >> 9) | top_side | left_side | (stable << 9) | bottom_side | right_side
+            # 確定石が増えなくなったら終了
+            new_stable: int = stable | (stone & tmp)
+            if new_stable == stable:
+                return stable
+            stable = new_stable
+
     def print_board(self):
         """
         与えられた盤面をコンソールに出力する関数。
@@ -440,14 +531,90 @@ class ArtificialIntelligence:
     :type think_depth: int
     :param square_value: 各マスの評価値
     :type square_value: List[int]
-    :type think_depth: int
+    :param epsilon: choose_put()で合法手からランダムに選ぶ確率
+    :type epsilon: float
+    :param temperature: choose_put()で最善手以外も選ぶための温度。0なら常に最善手を選ぶ。
+    :type temperature: float
+    :param end_depth: choose_put()で終盤の完全読みに切り替える空きマスの数。0なら切り替えない。
+    :type end_depth: int
     """
 
+    # nega_alpha_end()で確定石による枝刈りを試みるalphaの下限
+    STABLE_CUT_ALPHA: int = 0
+
     def __init__(self,
                  think_depth: int,
-                 square_value: List[int]):
+                 square_value: List[int],
+                 epsilon: float = 0.0,
+                 temperature: float = 0.0,
+                 end_depth: int = 0):
         self.think_depth: int = think_depth
         self.square_value: List[int] = square_value
+        self.epsilon: float = epsilon
+        self.temperature: float = temperature
+        self.end_depth: int = end_depth
+
+    def is_deterministic(self) -> bool:
+        """
+        choose_put()が同じ盤面に対して常に同じ手を返すかどうかを判定する関数。
+
+        :return: epsilonとtemperatureがともに0ならTrue
+        :rtype: bool
+        """
+        return self.epsilon == 0 and self.temperature == 0
+
+    def get_param_key(self) -> tuple:
+        """
+        choose_put()の結果を左右するパラメータをまとめて返す関数。
+        自己対局で同じ手順の対局かどうかを判定する際に、手順と合わせて用いる。
+
+        :return: 読みの深さ、マス評価値、完全読みに切り替える空きマスの数
+        :rtype: tuple
+        """
+        return self.think_depth, tuple(self.square_value), self.end_depth
+
+    def choose_put(self, now_board: 'OthelloBoard') -> int:
+        """
+        自己対局用に、epsilonとtemperatureに従って手を選び、それを返す関数。
+        確率epsilonで合法手からランダムに選び、それ以外はtemperatureが0なら最善手を、
+        0より大きければ各合法手の評価値のソフトマックスに従って選ぶ。
+        空きマスの数がend_depth以下なら、終盤の完全読みで最善手を選ぶ。
+
+        :param now_board: 盤面の情報
+        :type now_board: OthelloBoard
+        :return: 選んだ手(合法手がなければ-1を返す)
+        :rtype: int
+        """
+        # 確率epsilonでランダムに選ぶ
+        if self.epsilon > 0 and random.random() < self.epsilon:
+            return self.random(now_board)
+        # 空きマスの数がend_depth以下なら完全読みで最善手を選ぶ
+        blank_num: int = 64 - bin(now_board.my_stone | now_board.your_stone).count('1')
+        if blank_num <= self.end_depth:
+            _, best_put = self.nega_alpha_end(now_board)
+            return best_put
+        # 温度が0なら最善手を選ぶ
+        if self.temperature <= 0:
+            _, best_put = self.nega_alpha(0, now_board)
+            return best_put
+
+        # 合法手のリスト
+        legal_list: List[int] = now_board.get_legal_list()
+        # 合法手がなければ-1を返し、パスとみなす
+        if len(legal_list) == 0:
+            return -1
+        # 各合法手の評価値 順位付けのため枝刈りせずに求める
+        value_list: List[int] = []
+        for legal_put in legal_list:
+            now_board.reverse(legal_put)
+            child_value, _ = self.nega_alpha(1, now_board)
+            now_board.before_turn()
+            value_list.append(child_value)
+        # 評価値のソフトマックスを重みとして選ぶ(オーバーフローを避けるため最大値を引く)
+        max_value: int = max(value_list)
+        weight_list: List[float] = [math.exp((value - max_value) / self.temperature) for value in value_list]
+
+        return random.choices(legal_list, weights=weight_list)[0]
 
     def random(self, now_board: 'OthelloBoard') -> int:
         """
@@ -571,6 +738,61 @@ class ArtificialIntelligence:
         else:
             return -alpha, best_put
 
+    def nega_alpha_end(self,
+                       now_board: 'OthelloBoard',
+                       alpha: int = -64,
+                       beta: int = 64) -> (int, int):
+        """
+        終局まで読み切り、最終的な石の数の差が最大となる手をネガアルファ法で探索する関数。
+        相手の確定石から求めた石の数の差の上限がalpha以下となるノードは枝刈りする。
+
+        :param now_board: 現在の盤面。
+        :type now_board: OthelloBoard
+        :param alpha: 評価値の下限。
+        :type alpha: int
+        :param beta: 評価値の上限。
+        :type beta: int
+        :return: 手番側から見た最終的な石の数の差と最善手(合法手がなければ-1)。
+        :rtype: (int, int)
+        """
+        best_put: int = -1
+
+        # 相手の確定石は最後まで相手の石なので、石の数の差はこれを超えない
+        # 相手の確定石が十分に多くなければ上限がalpha以下にならないため、alphaが大きい場合のみ調べる
+        if alpha >= self.STABLE_CUT_ALPHA:
+            upper: int = 64 - 2 * bin(now_board.get_stable(False)).count('1')
+            if upper <= alpha:
+                return upper, best_put
+
+        # 合法手のリストを取得する
+        legal_list: List[int] = now_board.get_legal_list()
+        if len(legal_list) == 0:
+            # 終局していれば石の数の差を返す
+            if now_board.get_legal_board(False) == 0:
+                return bin(now_board.my_stone).count('1') - bin(now_board.your_stone).count('1'), best_put
+            # パスして相手の手番へ
+            now_board.pass_turn()
+            child_value, _ = self.nega_alpha_end(now_board, -beta, -alpha)
+            now_board.before_turn()
+            return -child_value, best_put
+
+        # 石の数の差の最大値
+        best_value: int = -65
+        # 合法手全てに枝を張る
+        for legal_put in legal_list:
+            now_board.reverse(legal_put)
+            child_value, _ = self.nega_alpha_end(now_board, -beta, -alpha)
+            now_board.before_turn()
+            if -child_value > best_value:
+                best_value = -child_value
+                best_put = legal_put
+            # alphaの更新を行い、betaを超えた場合は枝刈りをする
+            alpha = max(alpha, best_value)
+            if alpha >= beta:
+                break
+
+        return best_value, best_put
+
 
 class GameRecord:
     """
@@ -620,10 +842,17 @@ class GameRecord:
         your_legal: int = bin(self.board.get_legal_board()).count('1')
         # 開放度
         open_num: int = self.board.get_open_num()
+        # 四辺上の確定石の数は、従来の記録との互換性のため盤面全体の確定石とは別に記録する
         # 自分の確定石の数
         my_confirm: int = bin(self.board.get_confirm(False)).count('1')
         # 相手の確定石の数
         your_confirm: int = bin(self.board.get_confirm()).count('1')
+        # 石で埋まった列上のマス 両者の確定石の探索で使い回す
+        full_line: tuple = self.board.get_full_line()
+        # 自分の盤面全体の確定石の数
+        my_stable: int = bin(self.board.get_stable(False, full_line)).count('1')
+        # 相手の盤面全体の確定石の数
+        your_stable: int = bin(self.board.get_stable(True, full_line)).count('1')
 
         # 各マスの状態を表すリスト 1は黒、-1は白、0は空白を表す
         now_score: List[int] = [0 for _ in range(66)]
@@ -638,25 +867,31 @@ class GameRecord:
                 now_score[i + 1] = -1
 
         self.record.append([turn, stone_diff, square_value, my_legal, your_legal,
-                            open_num, my_confirm, your_confirm, 0])
+                            open_num, my_confirm, your_confirm, my_stable, your_stable, 0])
         self.score.append(now_score)
 
-    def save(self):
+    def save(self, record_exporter: Optional['exporter.Exporter'] = None):
+        """
+        記録したデータに勝敗を反映し、ファイルに書き出す。
+
+        :param record_exporter: 書き出しに用いるExporter。指定しなければCSVで書き出す。
+        :type record_exporter: Optional[exporter.Exporter]
+        """
         # 最終ターン(0-index)
         last_turn = len(self.record)
         # 対局の結果
         result = self.board.judge()
         for i in range(last_turn):
             if i % 2 == last_turn % 2:
-                self.record[i][8] = result
+                self.record[i][10] = result
                 self.score[i][65] = result
             else:
-                self.record[i][8] = result * -1
+                self.record[i][10] = result * -1
                 self.score[i][65] = result * -1
 
         # recordの列名
         record_columns = ['turn', 'stone_diff', 'square_value', 'my_legal', 'your_legal',
-                          'open_num', 'my_confirm', 'your_confirm', 'winner']
+                          'open_num', 'my_confirm', 'your_confirm', 'my_stable', 'your_stable', 'winner']
         # scoreの列名
         score_columns = ['turn',
                          'a1', 'b1', 'c1', 'd1', 'e1', 'f1', 'g1', 'h1',
@@ -668,12 +903,11 @@ class GameRecord:
                          'a7', 'b7', 'c7', 'd7', 'e7', 'f7', 'g7', 'h7',
                          'a8', 'b8', 'c8', 'd8', 'e8', 'f8', 'g8', 'h8',
                          'winner']
-        # recordをpandas.DataFrameに変換
-        df_record = pd.DataFrame(self.record, columns=record_columns).set_index('turn')
-        # scoreをpandas.DataFrameに変換
-        df_score = pd.DataFrame(self.score, columns=score_columns).set_index('turn')
+        # 書き出しに用いるExporter
+        if record_exporter is None:
+            record_exporter = exporter.CsvExporter()
         # 現在時刻をファイル名に適用する
         file_name = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')
 
-        df_record.to_csv(f'../data/record/record_{file_name}.csv')
-        df_score.to_csv(f'../data/score/score_{file_name}.csv')
+        record_exporter.export(f'../data/record/record_{file_name}', record_columns, self.record)
+        record_exporter.export(f'../data/score/score_{file_name}', score_columns, self.score)
@@ -1,11 +1,47 @@
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
+import exporter
 import logic
 import random
 import sys
 import time
 
 
-def main(loop_num: int = 1):
+def main(loop_num: int = 1,
+         opening_ply: int = 0,
+         epsilon: float = 0.0,
+         temperature: float = 0.0,
+         export_format: str = 'csv',
+         end_depth: int = 0):
+    """
+    自己対局を行い、各対局のデータを保存する関数。
+    同じ手順の対局は保存せず、以降の手順が確定した時点で既出と分かった対局は中断する。
+
+    :param loop_num: 対局数
+    :type loop_num: int
+    :param opening_ply: 序盤にランダムに打つ手数
+    :type opening_ply: int
+    :param epsilon: 合法手からランダムに選ぶ確率
+    :type epsilon: float
+    :param temperature: 各合法手の評価値から手を選ぶ際の温度
+    :type temperature: float
+    :param export_format: 対局データの書き出し形式('csv'、'bin'、'pandas'、'parquet')
+    :type export_format: str
+    :param end_depth: 終盤の完全読みに切り替える空きマスの数(0なら切り替えない)
+    :type end_depth: int
+    """
+    # 対局データの書き出しに用いるExporter
+    record_exporter = exporter.get_exporter(export_format)
+    # 序盤のランダム手順(AIのパラメータと手順の組)と、その手順から進んだ対局の総手数
+    seen_opening: Dict[Tuple[tuple, tuple], int] = {}
+    # 保存した対局の手順(AIのパラメータと手順の組)
+    seen_game: Set[Tuple[tuple, tuple]] = set()
+    # 既出の手順と分かり中断した対局数
+    abort_num: int = 0
+    # 中断により省略した手数
+    saved_ply_num: int = 0
+    # 終局後に既出の手順と分かり保存しなかった対局数
+    skip_num: int = 0
+
     for loop_count in range(loop_num):
         # 盤面のインスタンスを生成
         board = logic.OthelloBoard()
@@ -17,51 +53,113 @@ def main(loop_num: int = 1):
         #     black_square_value[i] = random.randint(-100, 100)
         #     white_square_value[i] = random.randint(-100, 100)
         # 各手番のAIのインスタンスを生成
-        ai_black = logic.ArtificialIntelligence(4, black_square_value)
-        ai_white = logic.ArtificialIntelligence(3, white_square_value)
+        ai_black = logic.ArtificialIntelligence(4, black_square_value, epsilon, temperature, end_depth)
+        ai_white = logic.ArtificialIntelligence(3, white_square_value, epsilon, temperature, end_depth)
         # 対局のデータ記録のインスタンスを生成
         game_record = logic.GameRecord(board, ai_black, ai_white)
+        # 序盤のランダム手順以降の手が確定的に決まるか
+        is_deterministic: bool = ai_black.is_deterministic() and ai_white.is_deterministic()
+        # 同じ手順でもAIのパラメータが異なれば別の対局とみなすため、手順と組にして判定する
+        param_key: tuple = (ai_black.get_param_key(), ai_white.get_param_key())
+        # ここまでの手順 ハッシュ値の衝突で別の対局を既出と誤判定しないよう、手をそのまま記録する
+        move_list: List[int] = []
+        # 序盤のランダム手順
+        opening_key: Optional[Tuple[tuple, tuple]] = None
+        # 現在の手数
+        ply: int = 0
+        # 既出の手順と分かり中断したか
+        is_abort: bool = False
 
         # 対局
         while not board.is_end():
             # board.print_board()
 
-            if board.now_turn:
-                _, put = ai_black.nega_alpha(0, board)
-                # put = ai_black.random(board)
-                if put != -1:
-                    board.reverse(put)
-                else:
-                    board.pass_turn()
+            # 序盤のランダム手順を打ち終えた時点で以降の手が確定するなら、既出の手順かどうかを判定する
+            if is_deterministic and ply == opening_ply:
+                opening_key = (param_key, tuple(move_list))
+                if opening_key in seen_opening:
+                    saved_ply_num += seen_opening[opening_key] - ply
+                    is_abort = True
+                    break
+
+            ai = ai_black if board.now_turn else ai_white
+            if ply < opening_ply:
+                put = ai.random(board)
             else:
-                _, put = ai_white.nega_alpha(0, board)
-                # put = ai_white.random(board)
-                if put != -1:
-                    board.reverse(put)
-                else:
-                    board.pass_turn()
+                put = ai.choose_put(board)
+            if put != -1:
+                board.reverse(put)
+            else:
+                board.pass_turn()
 
             # このターンのデータを記録する
             game_record.write()
+            # 手順を記録する
+            move_list.append(put)
+            ply += 1
+
+        if is_abort:
+            abort_num += 1
+            print(f'{loop_count + 1}/{loop_num}局目中断(既出の手順)')
+            continue
+        if opening_key is not None:
+            seen_opening[opening_key] = ply
+        game_key: Tuple[tuple, tuple] = (param_key, tuple(move_list))
+        if game_key in seen_game:
+            skip_num += 1
+            print(f'{loop_count + 1}/{loop_num}局目終了(既出の手順のため保存しない)')
+            continue
+        seen_game.add(game_key)
 
         # board.print_board()
-        game_record.save()
+        game_record.save(record_exporter)
         print(f'{loop_count + 1}/{loop_num}局目終了')
 
+    print(f'保存した対局数:{len(seen_game)}')
+    print(f'中断した対局数:{abort_num}(省略した手数:{saved_ply_num})')
+    print(f'保存しなかった対局数:{skip_num}')
+
+
+def get_arg(args: List[str], index: int, arg_type: type, default, choice_list: Optional[list] = None):
+    """
+    コマンドライン引数を指定された型に変換して返す関数。
+
+    :param args: コマンドライン引数のリスト
+    :type args: List[str]
+    :param index: 取得する引数の位置
+    :type index: int
+    :param arg_type: 変換先の型
+    :type arg_type: type
+    :param default: 引数が指定されていないか、変換できないか、choice_listに含まれない場合に返す値
+    :param choice_list: 取り得る値のリスト(指定しなければ値を制限しない)
+    :type choice_list: Optional[list]
+    :return: 変換した引数の値
+    """
+    if len(args) <= index:
+        return default
+    try:
+        value = arg_type(args[index])
+    except ValueError:
+        return default
+    if choice_list is not None and value not in choice_list:
+        return default
+
+    return value
+
 
 if __name__ == '__main__':
     # コマンドライン引数を取得
+    # 対局数 序盤にランダムに打つ手数 ランダムに選ぶ確率 温度 書き出し形式 完全読みに切り替える空きマスの数 の順に指定する
     args = sys.argv
     # 処理時間の計測開始
     start_time = time.time()
 
-    if len(args) > 0:
-        if args[1].isdigit():
-            main(int(args[1]))
-        else:
-            main()
-    else:
-        main()
+    main(get_arg(args, 1, int, 1),
+         get_arg(args, 2, int, 0),
+         get_arg(args, 3, float, 0.0),
+         get_arg(args, 4, float, 0.0),
+         get_arg(args, 5, str, 'csv', exporter.EXPORTER_NAME_LIST),
+         get_arg(args, 6, int, 0))
 
     # 処理時間の計測終了
     end_time = time.time()
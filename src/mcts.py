@@ -0,0 +1,488 @@
+import math
+import random
+import time
+from typing import List, Optional
+import logic
+
+
+class PlayoutKernel:
+    """
+    複数局のランダムプレイアウトをまとめて処理するクラス。
+    batch_size局分の盤面(64ビット)を1つの整数に並べて格納し、合法手の生成と石の反転をビット演算で一括して行う。
+
+    :param batch_size: 一度に処理する局数
+    :type batch_size: int
+    """
+
+    # 1局分の盤面のビット数
+    LANE_BIT: int = 64
+    # 1局分の盤面のバイト数
+    LANE_BYTE: int = 8
+
+    def __init__(self, batch_size: int):
+        self.batch_size: int = batch_size
+        # 各局の最下位ビットに1が立った整数 64ビットの値に掛けることで全局分に複製する
+        self.repeat: int = 0
+        for i in range(batch_size):
+            self.repeat |= 1 << (self.LANE_BIT * i)
+        repeat: int = self.repeat
+        # 全マス
+        self.full_mask: int = 0xff_ff_ff_ff_ff_ff_ff_ff * repeat
+        # 左右端の番兵
+        self.horizontal_mask: int = 0x7e_7e_7e_7e_7e_7e_7e_7e * repeat
+        # 上下端の番兵
+        self.vertical_mask: int = 0x00_ff_ff_ff_ff_ff_ff_00 * repeat
+        # 四辺の番兵
+        self.all_side_mask: int = 0x00_7e_7e_7e_7e_7e_7e_00 * repeat
+        # 探索方向ごとのシフト量と番兵 (シフト量, 番兵)
+        self.direction_list: List[tuple] = [(1, self.horizontal_mask),
+                                            (8, self.vertical_mask),
+                                            (9, self.all_side_mask),
+                                            (7, self.all_side_mask)]
+
+    def get_legal_board(self, my_stone: int, your_stone: int) -> int:
+        """
+        全局の合法手の位置をまとめて返す関数。
+
+        :param my_stone: 全局の手番側の石の位置
+        :type my_stone: int
+        :param your_stone: 全局の相手の石の位置
+        :type your_stone: int
+        :return: 全局の合法手の位置
+        :rtype: int
+        """
+        # 空きマス
+        blank_board: int = self.full_mask & ~(my_stone | your_stone)
+        # 合法手
+        legal_board: int = 0
+
+        for shift, mask in self.direction_list:
+            # 番兵を適用した相手の石
+            sentinel: int = your_stone & mask
+            # 左シフト方向
+            tmp: int = sentinel & (my_stone << shift)
+            tmp |= sentinel & (tmp << shift)
+            tmp |= sentinel & (tmp << shift)
+            tmp |= sentinel & (tmp << shift)
+            tmp |= sentinel & (tmp << shift)
+            tmp |= sentinel & (tmp << shift)
+            legal_board |= blank_board & (tmp << shift)
+            # 右シフト方向
+            tmp = sentinel & (my_stone >> shift)
+            tmp |= sentinel & (tmp >> shift)
+            tmp |= sentinel & (tmp >> shift)
+            tmp |= sentinel & (tmp >> shift)
+            tmp |= sentinel & (tmp >> shift)
+            tmp |= sentinel & (tmp >> shift)
+            legal_board |= blank_board & (tmp >> shift)
+
+        return legal_board
+
+    def get_reverse_board(self, put: int, my_stone: int, your_stone: int) -> int:
+        """
+        全局の反転する石の位置をまとめて返す関数。
+        置いた石から伸ばした相手の石の列と、自分の石から逆向きに伸ばした相手の石の列が重なる部分が反転する石となる。
+
+        :param put: 全局の石を置く位置(パスする局は0)
+        :type put: int
+        :param my_stone: 全局の手番側の石の位置
+        :type my_stone: int
+        :param your_stone: 全局の相手の石の位置
+        :type your_stone: int
+        :return: 全局の反転する石の位置
+        :rtype: int
+        """
+        # 反転する石の位置
+        rev: int = 0
+
+        for shift, mask in self.direction_list:
+            # 番兵を適用した相手の石
+            sentinel: int = your_stone & mask
+            # 置いた位置から左シフト方向
+            from_put: int = sentinel & (put << shift)
+            from_put |= sentinel & (from_put << shift)
+            from_put |= sentinel & (from_put << shift)
+            from_put |= sentinel & (from_put << shift)
+            from_put |= sentinel & (from_put << shift)
+            from_put |= sentinel & (from_put << shift)
+            # 自分の石から右シフト方向
+            from_my: int = sentinel & (my_stone >> shift)
+            from_my |= sentinel & (from_my >> shift)
+            from_my |= sentinel & (from_my >> shift)
+            from_my |= sentinel & (from_my >> shift)
+            from_my |= sentinel & (from_my >> shift)
+            from_my |= sentinel & (from_my >> shift)
+            rev |= from_put & from_my
+            # 置いた位置から右シフト方向
+            from_put = sentinel & (put >> shift)
+            from_put |= sentinel & (from_put >> shift)
+            from_put |= sentinel & (from_put >> shift)
+            from_put |= sentinel & (from_put >> shift)
+            from_put |= sentinel & (from_put >> shift)
+            from_put |= sentinel & (from_put >> shift)
+            # 自分の石から左シフト方向
+            from_my = sentinel & (my_stone << shift)
+            from_my |= sentinel & (from_my << shift)
+            from_my |= sentinel & (from_my << shift)
+            from_my |= sentinel & (from_my << shift)
+            from_my |= sentinel & (from_my << shift)
+            from_my |= sentinel & (from_my << shift)
+            rev |= from_put & from_my
+
+        return rev
+
+    def playout(self, my_stone: int, your_stone: int) -> float:
+        """
+        与えられた盤面からbatch_size局のランダムプレイアウトを行い、手番側の勝ち数を返す関数。
+
+        :param my_stone: 手番側の石の位置
+        :type my_stone: int
+        :param your_stone: 相手の石の位置
+        :type your_stone: int
+        :return: 手番側の勝ち数(引き分けは0.5勝として数える)
+        :rtype: float
+        """
+        lane_byte: int = self.LANE_BYTE
+        batch_size: int = self.batch_size
+        # 全局に同じ盤面を並べる
+        batch_my: int = my_stone * self.repeat
+        batch_your: int = your_stone * self.repeat
+        # 各局の連続パス回数 2回連続でパスした局は終局とみなす
+        pass_count: List[int] = [0 for _ in range(batch_size)]
+        # 終局した局の数
+        end_num: int = 0
+        # 開始時点から反転した手番の数
+        ply: int = 0
+
+        while end_num < batch_size:
+            legal_byte: bytes = self.get_legal_board(batch_my, batch_your).to_bytes(batch_size * lane_byte, 'little')
+            put_byte: bytearray = bytearray(batch_size * lane_byte)
+            end_num = 0
+            for i in range(batch_size):
+                legal_board: int = int.from_bytes(legal_byte[i * lane_byte:(i + 1) * lane_byte], 'little')
+                # 合法手がなければパス
+                if legal_board == 0:
+                    pass_count[i] += 1
+                    if pass_count[i] >= 2:
+                        end_num += 1
+                    continue
+                pass_count[i] = 0
+                # 合法手の中からランダムに一手選ぶ
+                for _ in range(random.randrange(bin(legal_board).count('1'))):
+                    legal_board &= legal_board - 1
+                put_byte[i * lane_byte:(i + 1) * lane_byte] = (legal_board & -legal_board).to_bytes(lane_byte, 'little')
+
+            if end_num == batch_size:
+                break
+
+            # 全局の石の反転処理と手番の交代を一括で行う
+            put: int = int.from_bytes(put_byte, 'little')
+            rev: int = self.get_reverse_board(put, batch_my, batch_your)
+            batch_my ^= put | rev
+            batch_your ^= rev
+            batch_my, batch_your = batch_your, batch_my
+            ply += 1
+
+        # 開始時点の手番側から見た石の位置
+        if ply % 2 == 1:
+            batch_my, batch_your = batch_your, batch_my
+        my_byte: bytes = batch_my.to_bytes(batch_size * lane_byte, 'little')
+        your_byte: bytes = batch_your.to_bytes(batch_size * lane_byte, 'little')
+        # 手番側の勝ち数
+        win_num: float = 0
+        for i in range(batch_size):
+            my_stone_count: int = bin(int.from_bytes(my_byte[i * lane_byte:(i + 1) * lane_byte], 'little')).count('1')
+            your_stone_count: int = \
+                bin(int.from_bytes(your_byte[i * lane_byte:(i + 1) * lane_byte], 'little')).count('1')
+            if my_stone_count > your_stone_count:
+                win_num += 1
+            elif my_stone_count == your_stone_count:
+                win_num += 0.5
+
+        return win_num
+
+
+class MonteCarloNode:
+    """
+    モンテカルロ木探索の探索木のノード。
+
+    :param my_stone: このノードの盤面における手番側の石の位置
+    :type my_stone: int
+    :param your_stone: このノードの盤面における相手の石の位置
+    :type your_stone: int
+    :param put: 親ノードからこのノードに至る手(パスは0)
+    :type put: int
+    :param parent: 親ノード
+    :type parent: Optional[MonteCarloNode]
+    :param prior: マス評価値から求めた事前評価(-1から1)
+    :type prior: float
+    """
+
+    __slots__ = ('my_stone', 'your_stone', 'put', 'parent', 'children', 'untried_list',
+                 'visit_num', 'win_num', 'prior', 'is_terminal')
+
+    def __init__(self,
+                 my_stone: int,
+                 your_stone: int,
+                 put: int = 0,
+                 parent: Optional['MonteCarloNode'] = None,
+                 prior: float = 0.0):
+        self.my_stone: int = my_stone
+        self.your_stone: int = your_stone
+        self.put: int = put
+        self.parent: Optional['MonteCarloNode'] = parent
+        self.children: List['MonteCarloNode'] = []
+        # 訪問回数
+        self.visit_num: float = 0
+        # 親ノードの手番側から見た勝ち数
+        self.win_num: float = 0
+        self.prior: float = prior
+
+        board = logic.OthelloBoard(my_stone, your_stone)
+        # 未展開の手のリスト 合法手がなく相手に合法手があればパス(0)のみとする
+        self.untried_list: List[int] = board.get_legal_list()
+        if len(self.untried_list) == 0 and board.get_legal_board(False) != 0:
+            self.untried_list = [0]
+        # 互いに合法手がなければ終局
+        self.is_terminal: bool = len(self.untried_list) == 0
+
+
+class MonteCarloTreeSearch:
+    """
+    UCTによるモンテカルロ木探索で着手を決めるクラス。
+    nega_alpha()の代わりに用いることを想定している。
+
+    :param playout_num: 1手あたりのプレイアウト回数
+    :type playout_num: int
+    :param batch_size: 1つの葉ノードから一度に行うプレイアウト回数
+    :type batch_size: int
+    :param square_value: 各マスの評価値。指定すると事前評価として選択に反映する。
+    :type square_value: Optional[List[int]]
+    :param max_node_num: 探索木のノード数の上限。超えた場合は展開を止めてプレイアウトのみ行う。
+    :type max_node_num: int
+    :param exploration: UCTの探索項の係数
+    :type exploration: float
+    :param prior_weight: 事前評価の重み
+    :type prior_weight: float
+    """
+
+    def __init__(self,
+                 playout_num: int = 4096,
+                 batch_size: int = 64,
+                 square_value: Optional[List[int]] = None,
+                 max_node_num: int = 100000,
+                 exploration: float = 1.4,
+                 prior_weight: float = 1.0):
+        self.playout_num: int = playout_num
+        self.batch_size: int = batch_size
+        self.square_value: Optional[List[int]] = square_value
+        self.max_node_num: int = max_node_num
+        self.exploration: float = exploration
+        self.prior_weight: float = prior_weight
+        self.kernel: 'PlayoutKernel' = PlayoutKernel(batch_size)
+        # 探索木の根 着手後も保持して次の探索で再利用する
+        self.root: Optional['MonteCarloNode'] = None
+        # 探索木のノード数
+        self.node_num: int = 0
+        # これまでに行ったプレイアウトの総数
+        self.playout_total: int = 0
+        # これまでの探索に費やしたCPU時間(秒)
+        self.search_time: float = 0.0
+
+    def search(self, now_board: 'logic.OthelloBoard') -> int:
+        """
+        与えられた盤面における最善手を探索して返す関数。
+
+        :param now_board: 盤面の情報
+        :type now_board: logic.OthelloBoard
+        :return: 最善手(合法手がなければ-1を返す)
+        :rtype: int
+        """
+        # 合法手がなければ-1を返し、パスとみなす
+        if now_board.get_legal_board() == 0:
+            return -1
+
+        start_time: float = time.process_time()
+        self.set_root(now_board.my_stone, now_board.your_stone)
+
+        playout_count: int = 0
+        while playout_count < self.playout_num:
+            leaf: 'MonteCarloNode' = self.select()
+            if leaf.is_terminal:
+                # 終局していればプレイアウトせずに勝敗をそのまま用いる
+                result: int = logic.OthelloBoard(leaf.my_stone, leaf.your_stone).judge()
+                win_num: float = self.batch_size * (result + 1) / 2
+            else:
+                win_num = self.kernel.playout(leaf.my_stone, leaf.your_stone)
+                self.playout_total += self.batch_size
+            playout_count += self.batch_size
+            self.backup(leaf, self.batch_size, win_num)
+
+        # 訪問回数が最も多い手を最善手とする
+        best_child: 'MonteCarloNode' = max(self.root.children, key=lambda child: child.visit_num)
+        self.search_time += time.process_time() - start_time
+
+        return best_child.put
+
+    def set_root(self, my_stone: int, your_stone: int):
+        """
+        探索木の根を与えられた盤面に合わせる関数。
+        前回の探索木の2手先までに同じ盤面があればその部分木を再利用する。
+
+        :param my_stone: 手番側の石の位置
+        :type my_stone: int
+        :param your_stone: 相手の石の位置
+        :type your_stone: int
+        """
+        node_list: List['MonteCarloNode'] = [self.root] if self.root is not None else []
+        for _ in range(3):
+            for node in node_list:
+                if node.my_stone == my_stone and node.your_stone == your_stone:
+                    node.parent = None
+                    self.root = node
+                    self.node_num = self.count_node(node)
+                    return
+            node_list = [child for node in node_list for child in node.children]
+
+        self.root = MonteCarloNode(my_stone, your_stone)
+        self.node_num = 1
+
+    def count_node(self, node: 'MonteCarloNode') -> int:
+        """
+        与えられたノードを根とする部分木のノード数を返す関数。
+
+        :param node: 部分木の根
+        :type node: MonteCarloNode
+        :return: ノード数
+        :rtype: int
+        """
+        count: int = 0
+        stack: List['MonteCarloNode'] = [node]
+        while len(stack) > 0:
+            now_node = stack.pop()
+            count += 1
+            stack.extend(now_node.children)
+
+        return count
+
+    def select(self) -> 'MonteCarloNode':
+        """
+        根からUCTに従って探索木を辿り、プレイアウトを行う葉ノードを返す関数。
+        未展開の手があり、ノード数が上限に達していなければ1つ展開する。
+
+        :return: プレイアウトを行うノード
+        :rtype: MonteCarloNode
+        """
+        node: 'MonteCarloNode' = self.root
+        while True:
+            if node.is_terminal:
+                return node
+            if len(node.untried_list) > 0:
+                # 根は着手を決めるために上限に関わらず展開する
+                if self.node_num < self.max_node_num or node is self.root:
+                    return self.expand(node)
+                if len(node.children) == 0:
+                    return node
+            node = self.select_child(node)
+
+    def select_child(self, node: 'MonteCarloNode') -> 'MonteCarloNode':
+        """
+        UCTの値が最大の子ノードを返す関数。
+        事前評価はPUCTと同様に親ノードの訪問回数の平方根に比例させ、子ノードの訪問回数に応じて弱める。
+        訪問回数は1回の訪問でbatch_sizeずつ増えるため、事前評価の項ではbatch_size単位で数える。
+
+        :param node: 親ノード
+        :type node: MonteCarloNode
+        :return: 選ばれた子ノード
+        :rtype: MonteCarloNode
+        """
+        log_visit: float = math.log(node.visit_num)
+        # 事前評価の項に用いる親ノードの訪問回数の平方根(batch_size単位)
+        sqrt_visit: float = math.sqrt(node.visit_num / self.batch_size)
+        best_child: 'MonteCarloNode' = node.children[0]
+        best_value: float = -math.inf
+        for child in node.children:
+            value: float = child.win_num / child.visit_num \
+                + self.exploration * math.sqrt(log_visit / child.visit_num) \
+                + self.prior_weight * child.prior * sqrt_visit / (1 + child.visit_num / self.batch_size)
+            if value > best_value:
+                best_value = value
+                best_child = child
+
+        return best_child
+
+    def expand(self, node: 'MonteCarloNode') -> 'MonteCarloNode':
+        """
+        未展開の手を1つ選んで子ノードを生成し、それを返す関数。
+        マス評価値が与えられていれば評価値の高い手から展開する。
+
+        :param node: 展開するノード
+        :type node: MonteCarloNode
+        :return: 生成した子ノード
+        :rtype: MonteCarloNode
+        """
+        prior_list: List[float] = [self.get_prior(put) for put in node.untried_list]
+        index: int = prior_list.index(max(prior_list))
+        put: int = node.untried_list.pop(index)
+
+        board = logic.OthelloBoard(node.my_stone, node.your_stone)
+        if put == 0:
+            board.pass_turn()
+        else:
+            board.reverse(put)
+        child = MonteCarloNode(board.my_stone, board.your_stone, put, node, prior_list[index])
+        node.children.append(child)
+        self.node_num += 1
+
+        return child
+
+    def get_prior(self, put: int) -> float:
+        """
+        マス評価値から手の事前評価を返す関数。
+
+        :param put: 手の位置(パスは0)
+        :type put: int
+        :return: -1から1に正規化した事前評価(マス評価値がなければ0)
+        :rtype: float
+        """
+        if self.square_value is None or put == 0:
+            return 0.0
+        max_value: int = max(abs(value) for value in self.square_value)
+        if max_value == 0:
+            return 0.0
+        # 左上から数えたマスの番号
+        index: int = 63 - (put.bit_length() - 1)
+
+        return self.square_value[index] / max_value
+
+    def backup(self, leaf: 'MonteCarloNode', visit_num: int, win_num: float):
+        """
+        プレイアウトの結果を葉ノードから根まで反映する関数。
+
+        :param leaf: プレイアウトを行ったノード
+        :type leaf: MonteCarloNode
+        :param visit_num: プレイアウト回数
+        :type visit_num: int
+        :param win_num: 葉ノードの手番側の勝ち数
+        :type win_num: float
+        """
+        node: Optional['MonteCarloNode'] = leaf
+        # 各ノードは親ノードの手番側から見た勝ち数を持つ
+        win_num = visit_num - win_num
+        while node is not None:
+            node.visit_num += visit_num
+            node.win_num += win_num
+            win_num = visit_num - win_num
+            node = node.parent
+
+    def get_playout_rate(self) -> float:
+        """
+        CPU時間1秒あたりのプレイアウト回数を返す関数。
+
+        :return: 1秒あたりのプレイアウト回数
+        :rtype: float
+        """
+        if self.search_time == 0:
+            return 0.0
+
+        return self.playout_total / self.search_time